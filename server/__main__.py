@@ -3,15 +3,56 @@
 import sys
 import argparse
 import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from gunicorn.app.base import BaseApplication
 from server.app import app
 from server import config
+from server.authors import get_author_manager
 from server.data_stream import run_jetstream
-from server.database import initialize_database
+from server.database import db, initialize_database
 from server.logger import set_log_level
 
 logger = logging.getLogger(__name__)
 
 
+class FeedApplication(BaseApplication):
+    """Gunicorn application serving the Flask app."""
+
+    def __init__(self, application, options=None):
+        self.application = application
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def _close_db_before_fork(server, worker):
+    """Keep workers from inheriting the master's database connection."""
+    db.close()
+
+
+def serve_app():
+    """Serve the Flask app with a pool of threaded gunicorn workers."""
+    FeedApplication(
+        app,
+        {
+            "bind": f"{config.HOST}:{config.PORT}",
+            "workers": config.WEB_WORKERS,
+            "worker_class": "gthread",
+            "threads": config.WEB_THREADS,
+            "preload_app": True,
+            "pre_fork": _close_db_before_fork,
+        },
+    ).run()
+
+
 def main():
     """Main entry point."""
     try:
@@ -40,29 +81,42 @@ def main():
             set_log_level(logging.INFO)
             logger.info("Debug mode enabled")
 
-        # Initialize the database
+        # Initialize the database while the seed authors are resolved, so
+        # both are ready before the app and jetstream processes fork
         logger.info("Initializing database...")
-        initialize_database(rebuild=args.rebuild_database)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            authors = executor.submit(get_author_manager)
+            initialize_database(rebuild=args.rebuild_database)
+            authors.result()
 
         # Run the app based on mode
         if args.app_only:
             logger.info(f"Starting app only mode on port {config.PORT}...")
-            app.run(host=config.HOST, port=config.PORT)
+            serve_app()
         elif args.jetstream_only:
             logger.info("Starting jetstream only mode...")
             run_jetstream()  # This will block as jetstream.py handles threading
         else:
             logger.info(f"Starting both app and jetstream on port {config.PORT}...")
-            # Start jetstream processing
-
-            # Start run_jetstream() in a separate thread
-            import threading
 
-            jetstream_thread = threading.Thread(target=run_jetstream, daemon=True)
-            jetstream_thread.start()
+            # Run jetstream in its own process so ingest and the API do not
+            # contend for the GIL. The connection is closed first so it is
+            # not shared across the fork; both sides reconnect on demand.
+            db.close()
+            stop_event = multiprocessing.Event()
+            jetstream_process = multiprocessing.Process(
+                target=run_jetstream, args=(stop_event,), name="jetstream"
+            )
+            jetstream_process.start()
 
-            # Run the Flask app in the main thread
-            app.run(host=config.HOST, port=config.PORT)
+            # Serve the Flask app from the main process
+            try:
+                serve_app()
+            finally:
+                stop_event.set()
+                jetstream_process.join(timeout=10)
+                if jetstream_process.is_alive():
+                    jetstream_process.terminate()
 
     except Exception as e:
         logger.error(f"Critical error in main: {e}", exc_info=True)
@@ -1,17 +1,94 @@
 """Feed ranking algorithm for SEO content."""
+from dataclasses import astuple
 from datetime import timedelta, timezone, datetime
-from typing import List, Dict, Any, Tuple, Optional
-from server.database import Post, get_utc_now
+from types import MappingProxyType
+from typing import Iterable, Mapping, Dict, Any, Tuple, Optional
+from server.database import db, Post, PostEngagement, get_utc_now
+from peewee import Case, fn, Select, Value
 from server.logger import logger
-from server.authors import author_manager
+from server.authors import get_author_manager
 from server import config
 import pandas as pd
 import numpy as np
-from time import time
+import numexpr as ne
+import multiprocessing
+from threading import Lock, RLock
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 
 # Feed identifier
 URI = config.DAILY_SEO_FEED_URI
 
+# Bumped on every invalidation and part of every cache key. The counter
+# lives in shared memory created before the Jetstream process and the
+# gunicorn workers are forked, so a flush in the ingest process retires
+# pages cached by the web workers. Processes started separately (e.g.
+# --app_only) only see their own bumps and fall back to CACHE_DURATION.
+_generation = multiprocessing.Value('Q', 0)
+# Generation this process's caches were last filled under
+_seen_generation = 0
+
+# Ranked feed pages keyed by (generation, cursor, limit), shared by all
+# rankers
+_feed_cache = TTLCache(maxsize=config.CACHE_SIZE, ttl=config.CACHE_DURATION)
+_feed_cache_lock = RLock()
+
+# Scored candidate frames keyed by (generation, cursor), so pages of any
+# size reuse one scoring pass; recomputes are serialized to avoid a
+# thundering herd
+_scored_cache = TTLCache(maxsize=config.CACHE_SIZE, ttl=config.CACHE_DURATION)
+_scored_lock = Lock()
+
+# Columns of the frame built by `PostRanker.build_base_df`
+BASE_COLUMNS = [
+    'post_id', 'uri', 'cid', 'author_handle', 'text', 'engagement_score',
+    'engaged_authors_count', 'velocity', 'indexed_at'
+]
+
+# Placeholders compiled into the candidate query and bound on each execution
+_CUTOFF = object()
+_LIFETIME_START = object()
+_WINDOW_START = object()
+_HALF_WINDOW_START = object()
+_CURSOR_INDEXED_AT = object()
+_CURSOR_CID = object()
+
+
+def _param(placeholder: object) -> Value:
+    """Wrap a placeholder so it is emitted as a bare query parameter."""
+    return Value(placeholder, converter=False)
+
+# Columns returned for each feed item, in response order
+FEED_COLUMNS = ['uri', 'author_handle', 'text', 'final_score', 'indexed_at']
+
+
+def build_decay_lut(lifetime_hours: int, midpoint: float,
+                    rate: float) -> np.ndarray:
+    """Precompute the sigmoid time decay for every minute of post age."""
+    age_hours = np.arange(lifetime_hours * 60 + 1) / 60
+    return (1.0 / (1.0 + np.exp((age_hours - midpoint) / rate))).astype(
+        np.float32)
+
+
+def invalidate_feed_cache() -> None:
+    """Retire cached feed pages in every process sharing the generation."""
+    with _generation.get_lock():
+        _generation.value += 1
+
+
+def _current_generation() -> int:
+    """Return the shared generation, first dropping entries cached under an
+    older one so they do not sit in memory until the TTL expires."""
+    global _seen_generation
+    generation = _generation.value
+    if generation != _seen_generation:
+        with _feed_cache_lock:
+            _feed_cache.clear()
+        with _scored_lock:
+            _scored_cache.clear()
+        _seen_generation = generation
+    return generation
+
 
 class PostRanker:
     """Handles post ranking and scoring logic."""
@@ -20,173 +97,345 @@ class PostRanker:
         """Initialize the post ranker with configuration."""
         self.config = config
         self.rank_config = config.rank_config
-        self.cache_duration = 300  # 5 minutes
-        self._last_cache_reset = time()
-        self._cached_df = None
-
-
-    def calculate_velocity(self, timestamps: List[str], now: datetime,
-                           window_hours: int) -> float:
-        """Calculate weighted velocity score."""
-        recent_count = 0
-        very_recent_count = 0
-
-        for ts in timestamps:
-            try:
-                interaction_time = datetime.fromisoformat(
-                    ts.replace('Z', '+00:00'))
-                age_hours = (now - interaction_time).total_seconds() / 3600
-
-                if age_hours <= window_hours:
-                    recent_count += 1
-                    if age_hours <= window_hours / 2:  # Extra weight for very recent
-                        very_recent_count += 1
-            except ValueError:
-                continue
-
-        return recent_count + (very_recent_count * 0.5)
+        self._decay_lut = build_decay_lut(config.POST_LIFETIME_HOURS,
+                                          self.rank_config.decay_midpoint,
+                                          self.rank_config.decay_rate)
+        self._horizon = self.score_horizon()
+        # Compiled candidate SQL keyed by whether a cursor filter is applied
+        self._compiled_queries: Dict[bool, Tuple[str, list]] = {}
+        self._compiled_peaks: Optional[Tuple[str, list]] = None
+
+
+    def score_horizon(self) -> timedelta:
+        """Return the oldest post age that can still reach the minimum score.
+
+        Components are normalized by their maxima over the whole
+        POST_LIFETIME_HOURS window (see `peaks_query`), so every normalized
+        component is at most 1 and a post scores at most
+        sum(SCORE_WEIGHTS) / 3 times its time decay. Only candidate rows
+        are limited to this horizon: older posts cannot clear
+        MIN_ENGAGEMENT_SCORE, and because the maxima still cover them,
+        dropping them does not change any other post's score.
+        """
+        lifetime = timedelta(hours=self.config.POST_LIFETIME_HOURS)
+        min_score = self.rank_config.min_engagement_score
+        if min_score <= 0:
+            return lifetime
+
+        ceiling = sum(astuple(self.rank_config.score_weights)) / 3
+        reachable = np.flatnonzero(self._decay_lut * ceiling >= min_score)
+        if reachable.size == 0:
+            return timedelta(0)
+
+        # Ages are looked up by whole minutes; one extra minute of slack
+        # absorbs float32 rounding at the boundary
+        return min(lifetime, timedelta(minutes=int(reachable[-1]) + 2))
+
+
+    def get_scored_posts(self,
+                         cursor: Optional[str] = None) -> pd.DataFrame:
+        """Get scored posts from the database, after the cursor if given."""
+
+        now = get_utc_now()
+        cutoff_time = now - self._horizon
+        lifetime_start = now - timedelta(hours=self.config.POST_LIFETIME_HOURS)
+        # Snapshot once per pass; `or 1` keeps the quorum division branch-free
+        total_authors = len(get_author_manager().author_dids) or 1
+
+        window = timedelta(hours=self.rank_config.recent_interaction_window)
+        bound = {
+            _CUTOFF: cutoff_time,
+            _LIFETIME_START: lifetime_start,
+            _WINDOW_START: now - window,
+            _HALF_WINDOW_START: now - window / 2,
+        }
 
+        position = self.handle_protocol_cursor(cursor)
+        if position is not None:
+            bound[_CURSOR_INDEXED_AT], bound[_CURSOR_CID] = position
 
-    def get_scored_posts(self) -> pd.DataFrame:
-        """Get all scored posts from the database."""
+        sql, params = self.compiled_query(keyset=position is not None)
+        rows = db.execute_sql(sql, [bound.get(p, p) for p in params])
 
-        cutoff_time = get_utc_now() - timedelta(
-            hours=self.config.POST_LIFETIME_HOURS)
-        
-        posts = list(Post.select().where(Post.indexed_at >= cutoff_time))
-
-        df = self.build_base_df(posts, get_utc_now())
+        df = self.build_base_df(rows)
 
         if len(df) == 0:
             return pd.DataFrame()
 
-        df = self.normalize_scores(df)
-        df = self.calculate_final_scores(df)
-
-        return df
-
-
-    def build_base_df(self, posts: List[Post], now: datetime) -> pd.DataFrame:
-        """Create initial dataframe with post data."""
-        data = []
-        for post in posts:
-            try:
-                engaged_authors = post.engaged_authors if isinstance(
-                    post.engaged_authors, list) else []
-
-                engaged_authors_count = len(engaged_authors)
-
-                # We don't want to consider posts that may just be interesting to one author.
-                if engaged_authors_count < self.rank_config[
-                        'MIN_AUTHOR_ENGAGEMENT']:
-                    continue
-
-                # Calculate basic engagement
-                engagement = (
-                    post.likes_count * self.rank_config['WEIGHT_LIKES'] +
-                    post.reposts_count * self.rank_config['WEIGHT_REPOSTS'] +
-                    post.replies_count * self.rank_config['WEIGHT_COMMENTS'])
-
-                # Ensure interaction_timestamp is List[str]
-                interaction_timestamps = [
-                    str(t) for t in post.interaction_timestamps
-                ] or []
-
-                # Calculate velocity
-                velocity = self.calculate_velocity(
-                    interaction_timestamps, now,
-                    self.rank_config['RECENT_INTERACTION_WINDOW'])
-
-                data.append({
-                    'post_id': post.id,
-                    'uri': post.uri,
-                    'cid': post.cid,
-                    'author_handle': post.author_handle,
-                    'text': post.text,
-                    'engagement_score': float(engagement),
-                    'engaged_authors_count': engaged_authors_count,
-                    'velocity': float(velocity),
-                    'indexed_at': post.indexed_at.replace(tzinfo=timezone.utc)
-                })
-
-            except Exception as e:
-                logger.error(f"Error processing post {post.uri}: {e}")
-                continue
-
-        df = pd.DataFrame(data)
-
-        if len(df) == 0:
-            return pd.DataFrame(columns=[
-                'post_id', 'uri', 'cid', 'author_handle', 'text',
-                'engagement_score', 'engaged_authors_count', 'velocity',
-                'indexed_at'
-            ])
-
-        return df
-
-
-    def normalize_scores(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Normalize scores for engagement, velocity, and quorum."""
-
-        if len(df) == 0:
-            return df
-            
-        # Normalization for engagement
-        df['engagement_norm'] = df['engagement_score'] / df['engagement_score'].max() if df['engagement_score'].max() > 0.0 else 0.0
-        
-        # Normalization for velocity
-        df['velocity_norm'] = df['velocity'] / df['velocity'].max() if df['velocity'].max() > 0.0 else 0.0
-        
-        # Adjusted quorum score calculation
-        total_authors = len(author_manager.author_dids)
-        df['quorum_score'] = df['engaged_authors_count'] / total_authors if total_authors > 0.0 else 0.0
-        df['quorum_norm'] = df['quorum_score'] / df['quorum_score'].max() if df['quorum_score'].max() > 0.0 else 0.0
-
-        # Rest of the function remains the same
-        df['age_hours'] = (pd.Timestamp(get_utc_now()) - df['indexed_at']).dt.total_seconds() / 3600
-        df['time_decay'] = 1 / (1 + np.exp((df['age_hours'] - self.rank_config['DECAY_MIDPOINT']) / self.rank_config['DECAY_RATE']))
-        
+        sql, params = self.compiled_peaks_query()
+        peak_engagement, peak_authors, peak_velocity = db.execute_sql(
+            sql, [bound.get(p, p) for p in params]).fetchone()
+        peaks = (float(peak_engagement or 0.0),
+                 float(peak_authors or 0) / total_authors,
+                 float(peak_velocity or 0.0))
+
+        return self.score_posts(df, total_authors, peaks)
+
+
+    def compiled_query(self, keyset: bool) -> Tuple[str, list]:
+        """Return the candidate SQL and its parameter template.
+
+        The query only changes shape with the cursor filter, so each shape
+        is compiled once and reused; placeholders in the template are
+        replaced with the per-request values before execution.
+        """
+        compiled = self._compiled_queries.get(keyset)
+        if compiled is None:
+            query = self.scored_posts_query(_param(_CUTOFF),
+                                            _param(_WINDOW_START),
+                                            _param(_HALF_WINDOW_START))
+            if keyset:
+                # Keyset filter served by the (indexed_at, cid) index
+                indexed_at = _param(_CURSOR_INDEXED_AT)
+                query = query.where((Post.indexed_at < indexed_at) |
+                                    ((Post.indexed_at == indexed_at) &
+                                     (Post.cid < _param(_CURSOR_CID))))
+            compiled = self._compiled_queries[keyset] = query.sql()
+        return compiled
+
+
+    def compiled_peaks_query(self) -> Tuple[str, list]:
+        """Return the normalization maxima SQL and its parameter template."""
+        if self._compiled_peaks is None:
+            self._compiled_peaks = self.peaks_query(
+                _param(_LIFETIME_START), _param(_WINDOW_START),
+                _param(_HALF_WINDOW_START)).sql()
+        return self._compiled_peaks
+
+
+    def cached_scored_posts(self, cursor: Optional[str]) -> pd.DataFrame:
+        """Get scored posts, reusing a recent scoring pass for the cursor.
+
+        Concurrent misses wait on one recompute rather than all querying
+        the database at once.
+        """
+        key = (_current_generation(), cursor)
+        with _scored_lock:
+            df = _scored_cache.get(key)
+            if df is None:
+                df = _scored_cache[key] = self.get_scored_posts(cursor)
         return df
 
 
-    def calculate_final_scores(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate final scores for posts."""
+    def component_expressions(self, window_start, half_window_start):
+        """Return the weighted engagement and velocity SQL expressions.
+
+        Each engagement inside the recent window counts 1 towards the
+        velocity, and 1.5 inside its most recent half, so both windows are
+        resolved by one CASE.
+        """
+        # Bind weights as raw values so they are not coerced by IntegerField.
+        def weight(key):
+            return Value(getattr(self.rank_config, key), converter=False)
+
+        base_engagement = (
+            Post.likes_count * weight('weight_likes') +
+            Post.reposts_count * weight('weight_reposts') +
+            Post.replies_count * weight('weight_comments'))
+        velocity = fn.SUM(Case(None, [
+            (PostEngagement.engaged_at >= half_window_start, 1.5),
+            (PostEngagement.engaged_at >= window_start, 1.0),
+        ], 0.0))
+        return base_engagement, velocity
+
+
+    def eligible_posts(self, query, since):
+        """Join engagement rows and keep posts with enough seed authors."""
+        return (query
+                .join(PostEngagement, on=(PostEngagement.post == Post.id))
+                .where((Post.indexed_at >= since) &
+                       (Post.engaged_authors_count >=
+                        self.rank_config.min_author_engagement))
+                .group_by(Post.id))
+
+
+    def scored_posts_query(self, cutoff_time, window_start,
+                           half_window_start):
+        """Build the candidate query with engagement aggregates in SQL.
+
+        Posts are filtered on the materialized engaged_authors_count before
+        joining, so only candidate posts have their engagement rows
+        aggregated. The weighted engagement sum and the velocity are
+        evaluated by the database. Only the columns consumed by
+        `build_base_df` are selected.
+        """
+        base_engagement, velocity = self.component_expressions(
+            window_start, half_window_start)
+
+        return self.eligible_posts(
+            Post.select(Post.id, Post.uri, Post.cid,
+                        Post.author_handle, Post.text,
+                        base_engagement.alias('base_engagement'),
+                        Post.engaged_authors_count,
+                        velocity.alias('velocity'),
+                        Post.indexed_at),
+            cutoff_time)
+
+
+    def peaks_query(self, lifetime_start, window_start, half_window_start):
+        """Build the query for the maxima used to normalize each component.
+
+        The maxima are taken over every eligible post in the
+        POST_LIFETIME_HOURS window, independent of the score horizon and
+        the cursor, so scores match a ranking of the whole window.
+        """
+        base_engagement, velocity = self.component_expressions(
+            window_start, half_window_start)
+        per_post = self.eligible_posts(
+            Post.select(base_engagement.alias('base_engagement'),
+                        Post.engaged_authors_count.alias('engaged_authors'),
+                        velocity.alias('velocity')),
+            lifetime_start).alias('per_post')
+
+        return Select(
+            [per_post],
+            [fn.MAX(per_post.c.base_engagement),
+             fn.MAX(per_post.c.engaged_authors),
+             fn.MAX(per_post.c.velocity)]).bind(db)
+
+
+    def build_base_df(self, rows: Iterable[tuple]) -> pd.DataFrame:
+        """Create initial dataframe with post data from query row tuples."""
+        rows = list(rows)
+
+        if len(rows) == 0:
+            return pd.DataFrame(columns=BASE_COLUMNS)
+
+        (post_ids, uris, cids, handles, texts, engagement,
+         engaged_authors_count, velocity, indexed_at) = zip(*rows)
+        n = len(rows)
+
+        # Scores only need a soft ordering, so single precision halves the
+        # bytes moved by every scoring pass
+        def column(values, dtype=np.float32):
+            return np.fromiter(values, dtype=dtype, count=n)
+
+        return pd.DataFrame({
+            'post_id': column(post_ids, np.int64),
+            'uri': uris,
+            'cid': cids,
+            'author_handle': handles,
+            'text': texts,
+            'engagement_score': column(engagement),
+            'engaged_authors_count': column(engaged_authors_count, np.int32),
+            'velocity': column(velocity),
+            'indexed_at': pd.to_datetime(indexed_at, utc=True),
+        })
+
+
+    def score_posts(self, df: pd.DataFrame, total_authors: int,
+                    peaks: Optional[Tuple[float, float, float]] = None
+                    ) -> pd.DataFrame:
+        """Calculate final scores for posts in a single fused pass.
+
+        The final score is the mean of the weighted, max-normalized
+        engagement, quorum and velocity components, scaled by a sigmoid
+        time decay read from a per-minute lookup table. Normalization and
+        weighting are folded into one scale factor per component so no
+        intermediate columns are allocated.
+
+        `peaks` holds the (engagement, quorum, velocity) maxima to normalize
+        by; when omitted they are taken from `df` itself.
+        """
 
         if len(df) == 0:
             return df
 
-        weights = self.rank_config['SCORE_WEIGHTS']
-        
-        # Calculate score with geometric mean approach
-        df['final_score'] = np.mean(
-            [(df['engagement_norm'] * weights['BASE_ENGAGEMENT']),
-            (df['quorum_norm'] * weights['QUORUM']),
-            (df['velocity_norm'] * weights['VELOCITY'])], axis=0
-        ) * df['time_decay']
-        
-        # Apply minimum score filter
-        df = df[df['final_score'] >= self.rank_config['MIN_ENGAGEMENT_SCORE']]
-        
-        return df.sort_values(['final_score', 'indexed_at'], ascending=[False, False])
-
-
-    def handle_protocol_cursor(self, df: pd.DataFrame,
-                               cursor: str) -> pd.DataFrame:
-        """Handle cursor pagination according to Bluesky protocol requirements."""
+        weights = self.rank_config.score_weights
+
+        # Validate the numeric inputs once instead of per post: a single
+        # NaN/inf would otherwise poison every max-normalized component
+        valid = (np.isfinite(df['engagement_score'].to_numpy()) &
+                 np.isfinite(df['velocity'].to_numpy()) &
+                 df['indexed_at'].notna().to_numpy())
+        if not valid.all():
+            logger.warning("Dropping %d posts with invalid score inputs",
+                           int((~valid).sum()))
+            df = df[valid]
+            if len(df) == 0:
+                return df
+
+        engagement = df['engagement_score'].to_numpy()
+        velocity = df['velocity'].to_numpy()
+
+        quorum = (df['engaged_authors_count'].to_numpy() /
+                  total_authors).astype(np.float32)
+
+        # Time decay is looked up by whole minutes of age, computed on int64
+        # nanoseconds rather than through the .dt accessor
+        now_ns = pd.Timestamp(get_utc_now()).value
+        indexed_ns = df['indexed_at'].to_numpy(
+            dtype='datetime64[ns]').view(np.int64)
+        age_minutes = (now_ns - indexed_ns) // 60_000_000_000
+        time_decay = self._decay_lut[np.clip(
+            age_minutes, 0, len(self._decay_lut) - 1)]
+
+        if peaks is None:
+            peaks = (engagement.max(), quorum.max(), velocity.max())
+        peak_engagement, peak_quorum, peak_velocity = peaks
+
+        def scale(peak, weight):
+            # Weight / (3 * max), or zero when the component is all zeros
+            return np.float32(weight / (3 * peak) if peak > 0.0 else 0.0)
+
+        # numexpr evaluates the weighted sum and decay in one blocked loop
+        # without materializing the intermediate arrays
+        final_score = ne.evaluate(
+            '(engagement * se + quorum * sq + velocity * sv) * time_decay',
+            local_dict={
+                'engagement': engagement,
+                'quorum': quorum,
+                'velocity': velocity,
+                'time_decay': time_decay,
+                'se': scale(peak_engagement, weights.base_engagement),
+                'sq': scale(peak_quorum, weights.quorum),
+                'sv': scale(peak_velocity, weights.velocity),
+            })
+
+        df = df.assign(final_score=final_score)
+
+        # Apply minimum score filter; ordering is left to the page selection
+        return df[df['final_score'] >= self.rank_config.min_engagement_score]
+
+
+    def handle_protocol_cursor(
+            self, cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+        """Parse a Bluesky protocol cursor into its (indexed_at, cid) position."""
         if not cursor or cursor == self.config.CURSOR_EOF:
-            return df
+            return None
 
         try:
             indexed_at_ts, cid = cursor.split("::")
-            indexed_at = datetime.fromtimestamp(
-                int(indexed_at_ts) / 1000).replace(tzinfo=timezone.utc)
-
-            # Filter based on protocol requirements
-            return df[((df['indexed_at'] == indexed_at) & (df['cid'] < cid)) |
-                      (df['indexed_at'] < indexed_at)]
+            indexed_at = datetime.fromtimestamp(int(indexed_at_ts) / 1000,
+                                                tz=timezone.utc)
+            return indexed_at, cid
         except (ValueError, TypeError) as e:
-            logger.error(f"Invalid cursor format: {e}")
-            return df
+            logger.error("Invalid cursor format: %s", e)
+            return None
+
+
+    @staticmethod
+    def top_positions(df: pd.DataFrame, limit: int) -> np.ndarray:
+        """Return positions of the best `limit` posts, by score then recency.
+
+        Non-negative float32 scores have bit patterns that sort like their
+        values, so they form the high half of one int64 key with the
+        millisecond indexed_at offset as tiebreak. A single argpartition
+        then selects the page and only those rows are sorted.
+        """
+        score_bits = df['final_score'].to_numpy(dtype=np.float32).view(
+            np.int32).astype(np.int64)
+        indexed_ms = df['indexed_at'].to_numpy(dtype='datetime64[ms]').view(
+            np.int64)
+        recency = np.minimum(indexed_ms - indexed_ms.min(), 0xFFFFFFFF)
+        key = (score_bits << 32) | recency
+
+        split = len(key) - limit
+        if split > 0:
+            top = np.argpartition(key, split)[split:]
+        else:
+            top = np.arange(len(key))
+        return top[np.argsort(key[top])[::-1]]
 
 
     def get_protocol_cursor(self, df: pd.DataFrame, page_df: pd.DataFrame,
@@ -201,49 +450,58 @@ class PostRanker:
 
 
     def get_posts(self, cursor: Optional[str],
-                  limit: int) -> Tuple[List[Dict[str, Any]], str]:
+                  limit: int) -> Tuple[Tuple[Mapping[str, Any], ...], str]:
         """Get paginated, ranked posts."""
         try:
             limit = min(max(1, limit),
                         100)  # Ensure limit is between 1 and 100
 
-            # Get scored posts
-            df = self.get_scored_posts()
+            return self._get_page(cursor, limit)
 
-            if len(df) == 0:
-                return [], self.config.CURSOR_EOF
+        except Exception as e:
+            logger.error("Error in get_posts: %s", e, exc_info=True)
+            return (), self.config.CURSOR_EOF
 
-            # Apply cursor pagination
-            df = self.handle_protocol_cursor(df, cursor)
 
-            # Get page
-            page_df = df.head(limit)
+    @cached(_feed_cache,
+            key=lambda self, cursor, limit: hashkey(_current_generation(),
+                                                    cursor, limit),
+            lock=_feed_cache_lock)
+    def _get_page(self, cursor: Optional[str],
+                  limit: int) -> Tuple[Tuple[Mapping[str, Any], ...], str]:
+        """Build a feed page; results are cached for CACHE_DURATION seconds
+        or until the next invalidation.
 
-            if len(page_df) == 0:
-                return [], self.config.CURSOR_EOF
+        Cached pages are handed to every caller, so they are returned as a
+        tuple of read-only mappings.
+        """
+        # Get scored posts after the cursor position
+        df = self.cached_scored_posts(cursor)
 
-            # Generate next cursor
-            next_cursor = self.get_protocol_cursor(df, page_df, limit)
+        if len(df) == 0:
+            return (), self.config.CURSOR_EOF
 
-            # Prepare response
-            feed = [
-                {
-                    'uri': row['uri'],
-                    'author_handle': row['author_handle'],
-                    'text': row['text'],
-                    'engagement_score': row['final_score'],
-                    'indexed_at': row['indexed_at']
-                }
-                for _, row in page_df.iterrows()
-            ]
+        # Get page: only the top `limit` rows are ordered, not the whole frame
+        page_df = df.iloc[self.top_positions(df, limit)]
 
+        if len(page_df) == 0:
+            return (), self.config.CURSOR_EOF
 
-            return feed, next_cursor
+        # Generate next cursor
+        next_cursor = self.get_protocol_cursor(df, page_df, limit)
+
+        # Prepare response column-wise rather than building a Series per row
+        records = page_df[FEED_COLUMNS].rename(
+            columns={'final_score': 'engagement_score'}
+        ).to_dict('records')
+        feed = tuple(MappingProxyType(record) for record in records)
+
+        return feed, next_cursor
 
-        except Exception as e:
-            logger.error(f"Error in get_posts: {e}", exc_info=True)
-            return [], self.config.CURSOR_EOF
 
+# Shared ranker: the decay table is built once and pages come from the
+# module-level feed cache, so there is no per-request setup
+_RANKER = PostRanker(config)
 
 
 def handler(cursor: Optional[str], limit: int) -> Dict[str, Any]:
@@ -257,8 +515,7 @@ def handler(cursor: Optional[str], limit: int) -> Dict[str, Any]:
         Dict containing cursor and feed posts in Bluesky's expected format
     """
     try:
-        ranker = PostRanker(config)
-        feed, next_cursor = ranker.get_posts(cursor, limit)
+        feed, next_cursor = _RANKER.get_posts(cursor, limit)
         
         # Format posts according to Bluesky's expected structure
         formatted_feed = [{"post": post["uri"]} for post in feed]
@@ -268,5 +525,5 @@ def handler(cursor: Optional[str], limit: int) -> Dict[str, Any]:
             "feed": formatted_feed
         }
     except Exception as e:
-        logger.error(f"Handler error: {e}")
+        logger.error("Handler error: %s", e)
         return {"cursor": config.CURSOR_EOF, "feed": []}
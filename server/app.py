@@ -1,11 +1,12 @@
 # server/app.py
 """A Flask app for the Bluesky Feed Generator."""
 
-from flask import Flask, jsonify, request, send_from_directory, render_template
+import orjson
+from flask import Flask, Response, request, send_from_directory, render_template
 from server.algos import algos
 from server.database import Post
 from server import config
-from server.algos.daily_seo_feed import PostRanker
+from server.algos.daily_seo_feed import _RANKER as ranker
 
 import logging
 
@@ -13,11 +14,16 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_url_path="/public")
 
+
+def json_response(obj, status=200):
+    """Serialize a JSON response body with orjson."""
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
+
 @app.route("/")
 def index():
     """Home page route showing ranked posts."""
     try:
-        ranker = PostRanker(config)
         posts, _ = ranker.get_posts(cursor=None, limit=20)
 
         if not posts:
@@ -44,35 +50,43 @@ def index():
 
 
 
+# Static documents derived from config, serialized once at import
+SERVES_DID_DOCUMENT = config.SERVICE_DID.endswith(config.FEEDGEN_HOSTNAME)
+DID_DOCUMENT = orjson.dumps(
+    {
+        "@context": ["https://www.w3.org/ns/did/v1"],
+        "id": config.SERVICE_DID,
+        "service": [
+            {
+                "id": "#bsky_fg",
+                "type": "BskyFeedGenerator",
+                "serviceEndpoint": f"https://{config.FEEDGEN_HOSTNAME}",
+            }
+        ],
+    }
+)
+FEED_GENERATOR_DESCRIPTION = orjson.dumps(
+    {
+        "encoding": "application/json",
+        "body": {
+            "did": config.SERVICE_DID,
+            "feeds": [{"uri": uri} for uri in algos.keys()],
+        },
+    }
+)
+
 @app.route("/.well-known/did.json", methods=["GET"])
 def did_json():
     """DID document endpoint."""
-    if not config.SERVICE_DID.endswith(config.FEEDGEN_HOSTNAME):
+    if not SERVES_DID_DOCUMENT:
         return "", 404
 
-    return jsonify(
-        {
-            "@context": ["https://www.w3.org/ns/did/v1"],
-            "id": config.SERVICE_DID,
-            "service": [
-                {
-                    "id": "#bsky_fg",
-                    "type": "BskyFeedGenerator",
-                    "serviceEndpoint": f"https://{config.FEEDGEN_HOSTNAME}",
-                }
-            ],
-        }
-    )
+    return Response(DID_DOCUMENT, mimetype="application/json")
 
 @app.route("/xrpc/app.bsky.feed.describeFeedGenerator", methods=["GET"])
 def describe_feed_generator():
     """Feed generator description endpoint."""
-    feeds = [{"uri": uri} for uri in algos.keys()]
-    response = {
-        "encoding": "application/json",
-        "body": {"did": config.SERVICE_DID, "feeds": feeds},
-    }
-    return jsonify(response)
+    return Response(FEED_GENERATOR_DESCRIPTION, mimetype="application/json")
 
 @app.route("/xrpc/app.bsky.feed.getFeedSkeleton", methods=["GET"])
 def get_feed_skeleton():
@@ -98,7 +112,7 @@ def get_feed_skeleton():
         logger.error(f"Error in getFeedSkeleton: {e}")
         return "Internal server error", 500
 
-    return jsonify(body)
+    return json_response(body)
 
 @app.route("/public/<path:filename>")
 def serve_static(filename):
@@ -110,7 +124,7 @@ def health_check():
     """Health check endpoint."""
     try:
         recent_posts = Post.select().count()
-        return jsonify(
+        return json_response(
             {
                 "status": "healthy",
                 "posts_count": recent_posts,
@@ -118,4 +132,4 @@ def health_check():
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return jsonify({"status": "unhealthy", "error": str(e)}), 500
\ No newline at end of file
+        return json_response({"status": "unhealthy", "error": str(e)}, 500)
\ No newline at end of file
@@ -1,11 +1,20 @@
 # server/authors.py
 """Authors module for the feed generator service."""
 
-from typing import Set, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, Optional
+from cachetools import TTLCache
 from tqdm.auto import tqdm
-from atproto import Client
+from server import config, xrpc
 
+import atexit
+import functools
+import json
 import logging
+import os
+import tempfile
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -13,12 +22,101 @@ logger = logging.getLogger(__name__)
 class AuthorManager:
 
     def __init__(self):
-        self._client = Client()
         self._handle_to_did: Dict[str, str] = {}
         self._did_to_handle: Dict[str, str] = {}
-        self.author_dids: Set[str] = set()
+        # Resolution time per handle, used to expire persisted entries
+        self._fetched_at: Dict[str, float] = {}
+        # Handles of post authors outside the seed list; bounded and not
+        # persisted, unlike the seed author mappings above
+        self._post_author_handles: TTLCache = TTLCache(
+            maxsize=config.DID_CACHE_SIZE, ttl=config.DID_CACHE_TTL
+        )
+        self._post_author_lock = Lock()
+        self.author_dids: FrozenSet[str] = frozenset()
+        # Set when mappings change; the process that changed them saves them
+        self._dirty = False
+        self._saver_pid: Optional[int] = None
+        self._save_lock = Lock()
+        self._load_handle_cache()
         self._load_user_list()
 
+    def _remember(self, handle: str, did: str) -> None:
+        """Record a handle <-> DID mapping and when it was resolved."""
+        self._handle_to_did[handle] = did
+        self._did_to_handle[did] = handle
+        self._fetched_at[handle] = time.time()
+        self._mark_dirty()
+
+    def _mark_dirty(self) -> None:
+        """Note unsaved mappings and save them when this process exits."""
+        with self._save_lock:
+            self._dirty = True
+            if self._saver_pid != os.getpid():
+                self._saver_pid = os.getpid()
+                atexit.register(self._save_at_exit)
+
+    def _save_at_exit(self) -> None:
+        # Forked workers inherit the hook; only the process that changed the
+        # mappings writes them
+        if os.getpid() == self._saver_pid:
+            self._save_handle_cache()
+
+    def _load_handle_cache(self) -> None:
+        """Load unexpired handle -> DID mappings persisted by a previous run."""
+        try:
+            with open(config.HANDLE_CACHE_PATH, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable handle cache: {e}")
+            return
+
+        oldest = time.time() - config.HANDLE_CACHE_TTL
+        for handle, entry in entries.items():
+            if entry["fetched_at"] >= oldest:
+                self._handle_to_did[handle] = entry["did"]
+                self._did_to_handle[entry["did"]] = handle
+                self._fetched_at[handle] = entry["fetched_at"]
+
+    def _save_handle_cache(self) -> None:
+        """Persist resolved mappings so restarts only resolve cache misses."""
+        with self._save_lock:
+            if not self._dirty:
+                return
+            # Cleared before the snapshot so a concurrent change is saved
+            # again rather than lost
+            self._dirty = False
+            entries = {
+                handle: {
+                    "did": did,
+                    "fetched_at": self._fetched_at.get(handle, 0.0),
+                }
+                for handle, did in self._handle_to_did.items()
+            }
+
+        path = os.path.abspath(config.HANDLE_CACHE_PATH)
+        tmp_path = None
+        try:
+            # A private temp file per writer, so concurrent saves never
+            # publish each other's partial output
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=os.path.dirname(path),
+                prefix=f".{os.path.basename(path)}.",
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                tmp_path = f.name
+                json.dump(entries, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not save handle cache: {e}")
+            self._dirty = True
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def _normalize_handle(self, handle: str) -> str:
         """Normalize a handle by removing '@' prefix."""
         return handle.strip().lower().lstrip("@")
@@ -29,39 +127,41 @@ class AuthorManager:
         if normalized_handle in self._handle_to_did:
             return self._handle_to_did[normalized_handle]
 
-        retries = 3
-        for attempt in range(retries):
-            try:
-                result = self._client.resolve_handle(normalized_handle)
-                self._handle_to_did[normalized_handle] = result.did
-                self._did_to_handle[result.did] = normalized_handle
-                return result.did
-            except Exception as e:
-                if attempt == retries - 1:
-                    logger.error(f"Failed to resolve handle {normalized_handle}: {e}")
-                    return None
-                logger.warning(
-                    f"Retry {attempt + 1}/{retries} for handle {normalized_handle}: {e}"
-                )
+        # xrpc.query retries throttled and failed calls with backoff
+        try:
+            did = xrpc.query(
+                "com.atproto.identity.resolveHandle", handle=normalized_handle
+            )["did"]
+        except Exception as e:
+            logger.error(f"Failed to resolve handle {normalized_handle}: {e}")
+            return None
+
+        self._remember(normalized_handle, did)
+        return did
+
+    def _cached_handle(self, did: str) -> Optional[str]:
+        """Return a known handle for a DID without a network call."""
+        handle = self._did_to_handle.get(did)
+        if handle is None:
+            with self._post_author_lock:
+                handle = self._post_author_handles.get(did)
+        return handle
 
     def _resolve_did_to_handle(self, did: str) -> Optional[str]:
         """Resolve a DID to a handle, with proper error handling."""
-        if did in self._did_to_handle:
-            return self._did_to_handle[did]
-
-        retries = 3
-        for attempt in range(retries):
-            try:
-                profile = self._client.com.atproto.repo.describe_repo({"repo": did})
-                handle = profile.handle
-                self._did_to_handle[did] = handle
-                self._handle_to_did[handle] = did
-                return handle
-            except Exception as e:
-                if attempt == retries - 1:
-                    logger.error(f"Failed to resolve DID {did}: {e}")
-                    return None
-                logger.warning(f"Retry {attempt + 1}/{retries} for DID {did}: {e}")
+        handle = self._cached_handle(did)
+        if handle is not None:
+            return handle
+
+        try:
+            handle = xrpc.query("com.atproto.repo.describeRepo", repo=did)["handle"]
+        except Exception as e:
+            logger.error(f"Failed to resolve DID {did}: {e}")
+            return None
+
+        with self._post_author_lock:
+            self._post_author_handles[did] = handle
+        return handle
 
     def _load_user_list(self) -> None:
         """Load and resolve handles from user_list.txt."""
@@ -71,28 +171,45 @@ class AuthorManager:
                     self._normalize_handle(line.strip()) for line in f if line.strip()
                 }
 
-            new_dids = set()
-            for handle in tqdm(handles, desc="Converting author handles"):
-                did = self._resolve_handle(handle)
-                if did:
-                    new_dids.add(did)
-                else:
-                    logger.warning(f"Could not resolve handle: {handle}")
+            new_dids = {
+                self._handle_to_did[handle]
+                for handle in handles
+                if handle in self._handle_to_did
+            }
+
+            # Only handles missing from the persisted cache hit the network,
+            # and those are resolved concurrently
+            misses = [handle for handle in handles if handle not in self._handle_to_did]
+            if misses:
+                with ThreadPoolExecutor(
+                    max_workers=config.HANDLE_RESOLVE_WORKERS
+                ) as executor:
+                    resolved = executor.map(self._resolve_handle, misses)
+                    for handle, did in tqdm(
+                        zip(misses, resolved),
+                        total=len(misses),
+                        desc="Converting author handles",
+                    ):
+                        if did:
+                            new_dids.add(did)
+                        else:
+                            logger.warning(f"Could not resolve handle: {handle}")
+                self._save_handle_cache()
 
             if not new_dids:
                 logger.warning("No valid DIDs found in user list")
 
-            self.author_dids = new_dids
+            self.author_dids = frozenset(new_dids)
             logger.info(f"Loaded {len(self.author_dids)} author DIDs")
 
         except FileNotFoundError:
             logger.warning(
                 "user_list.txt not found. Proceeding without author engagement tracking."
             )
-            self.author_dids = set()
+            self.author_dids = frozenset()
         except Exception as e:
             logger.error(f"Error loading user list: {e}")
-            self.author_dids = set()
+            self.author_dids = frozenset()
 
     def is_author(self, did: str) -> bool:
         """Check if a DID belongs to an author."""
@@ -102,6 +219,28 @@ class AuthorManager:
         """Public method to resolve DID to handle."""
         return self._resolve_did_to_handle(did)
 
+    def resolve_many(self, dids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Resolve several DIDs to handles, looking up misses concurrently."""
+        handles: Dict[str, Optional[str]] = {}
+        misses = []
+        for did in set(dids):
+            handle = self._cached_handle(did)
+            if handle is None:
+                misses.append(did)
+            else:
+                handles[did] = handle
+
+        if misses:
+            with ThreadPoolExecutor(
+                max_workers=min(len(misses), config.HANDLE_RESOLVE_WORKERS)
+            ) as executor:
+                handles.update(
+                    zip(misses, executor.map(self._resolve_did_to_handle, misses))
+                )
+        return handles
+
 
-# Initialize a singleton instance of AuthorManager
-author_manager = AuthorManager()
+@functools.lru_cache(maxsize=1)
+def get_author_manager() -> AuthorManager:
+    """Return the shared AuthorManager, loading the seed authors on first use."""
+    return AuthorManager()
@@ -2,6 +2,8 @@
 """Confiuration for the feed generator service."""
 
 import os
+from dataclasses import dataclass
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -34,34 +36,81 @@ DATABASE_SSL_MODE = os.environ.get("DATABASE_SSL_MODE", "REQUIRED")
 STAGE = os.environ.get("STAGE", "DEV")
 HOST = os.environ.get("HOST", "0.0.0.0")
 PORT = os.environ.get("PORT", 8080)
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+WEB_THREADS = int(os.environ.get("WEB_THREADS", 4))
 
 
 # Core configuration settings
 POST_LIFETIME_HOURS = int(os.environ.get("POST_LIFETIME_HOURS", 24))
 CURSOR_EOF = "eof"
 
+# Feed page cache
+CACHE_DURATION = int(os.environ.get("CACHE_DURATION", 300))  # seconds
+CACHE_SIZE = int(os.environ.get("CACHE_SIZE", 256))
+
+# XRPC service used for handle and DID resolution
+XRPC_BASE_URL = os.environ.get("XRPC_BASE_URL", "https://bsky.social/xrpc/")
+XRPC_RETRIES = int(os.environ.get("XRPC_RETRIES", 3))
+XRPC_MAX_CONCURRENCY = int(os.environ.get("XRPC_MAX_CONCURRENCY", 32))
+# Client-side request quota (requests per window of seconds)
+XRPC_RATE_LIMIT = int(os.environ.get("XRPC_RATE_LIMIT", 3000))
+XRPC_RATE_WINDOW = int(os.environ.get("XRPC_RATE_WINDOW", 300))
+
+# Seed author handle -> DID resolutions persisted across restarts
+HANDLE_CACHE_PATH = os.environ.get("HANDLE_CACHE_PATH", "handle_cache.json")
+HANDLE_CACHE_TTL = int(os.environ.get("HANDLE_CACHE_TTL", 7 * 24 * 3600))  # seconds
+HANDLE_RESOLVE_WORKERS = int(os.environ.get("HANDLE_RESOLVE_WORKERS", 16))
+
+# Post author DID -> handle resolutions kept in memory
+DID_CACHE_SIZE = int(os.environ.get("DID_CACHE_SIZE", 100_000))
+DID_CACHE_TTL = int(os.environ.get("DID_CACHE_TTL", 24 * 3600))  # seconds
+
 # Ranking configuration
-rank_config = {
+@dataclass(frozen=True)
+class ScoreWeights:
+    """Weights of the score components."""
+
+    base_engagement: float
+    quorum: float
+    velocity: float
+
+
+@dataclass(frozen=True)
+class RankConfig:
+    """Ranking parameters, read from the environment once at import."""
+
     # Engagement weights
-    'WEIGHT_LIKES': float(os.environ.get("WEIGHT_LIKES", 2.0)),
-    'WEIGHT_REPOSTS': float(os.environ.get("WEIGHT_REPOSTS", 3.0)),
-    'WEIGHT_COMMENTS': float(os.environ.get("WEIGHT_COMMENTS", 1.0)),
-    
+    weight_likes: float
+    weight_reposts: float
+    weight_comments: float
+
     # Score component weights
-    'SCORE_WEIGHTS': {
-        'BASE_ENGAGEMENT': float(os.environ.get("BASE_ENGAGEMENT", 0.4)),
-        'QUORUM': float(os.environ.get("QUORUM", 0.4)),
-        'VELOCITY': float(os.environ.get("VELOCITY", 0.3))
-    },
-    
+    score_weights: ScoreWeights
+
     # Time decay parameters
-    'DECAY_MIDPOINT': int(os.environ.get("DECAY_MIDPOINT", 12)),  # hours
-    'DECAY_RATE': int(os.environ.get("DECAY_RATE", 4)),
+    decay_midpoint: int  # hours
+    decay_rate: int
 
     # Velocity calculation parameters
-    'RECENT_INTERACTION_WINDOW': int(os.environ.get("RECENT_INTERACTION_WINDOW", 4)),  # hours
-    
+    recent_interaction_window: int  # hours
+
     # Minimum thresholds
-    'MIN_ENGAGEMENT_SCORE': float(os.environ.get("MIN_ENGAGEMENT_SCORE", 0.01)),
-    'MIN_AUTHOR_ENGAGEMENT': int(os.environ.get("MIN_AUTHOR_ENGAGEMENT", 2)) 
-}
+    min_engagement_score: float
+    min_author_engagement: int
+
+
+rank_config = RankConfig(
+    weight_likes=float(os.environ.get("WEIGHT_LIKES", 2.0)),
+    weight_reposts=float(os.environ.get("WEIGHT_REPOSTS", 3.0)),
+    weight_comments=float(os.environ.get("WEIGHT_COMMENTS", 1.0)),
+    score_weights=ScoreWeights(
+        base_engagement=float(os.environ.get("BASE_ENGAGEMENT", 0.4)),
+        quorum=float(os.environ.get("QUORUM", 0.4)),
+        velocity=float(os.environ.get("VELOCITY", 0.3)),
+    ),
+    decay_midpoint=int(os.environ.get("DECAY_MIDPOINT", 12)),
+    decay_rate=int(os.environ.get("DECAY_RATE", 4)),
+    recent_interaction_window=int(os.environ.get("RECENT_INTERACTION_WINDOW", 4)),
+    min_engagement_score=float(os.environ.get("MIN_ENGAGEMENT_SCORE", 0.01)),
+    min_author_engagement=int(os.environ.get("MIN_AUTHOR_ENGAGEMENT", 2)),
+)
@@ -1,24 +1,25 @@
 """Data filtering and engagement tracking for the feed generator."""
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, timezone
-import threading
-from typing import Optional
-from atproto import Client, AtUri
-from server.database import db, Post, get_utc_now
-from server import config
-from server.authors import author_manager
+from typing import Dict, Iterable, Optional, Tuple, Union
+from atproto import AtUri
+from peewee import fn
+from server.database import db, Post, PostEngagement, get_utc_now, hash_uri
+from server import config, xrpc
+from server.authors import get_author_manager
 import logging
 
 logger = logging.getLogger(__name__)
-client = Client()
 
 
 class AuthorEngagementTracker:
-    """Tracks engagement metrics from seedlist users."""
+    """Tracks engagement metrics from seedlist users.
 
-    def __init__(self):
-        """Initialize the engagement tracker with a lock."""
-        self._lock = threading.Lock()
+    The tracker keeps no in-process state: counters are incremented in SQL
+    and duplicate author engagement is ignored by the unique index, so
+    concurrent callers need no lock.
+    """
 
     def update_engagement(
         self, uri: str, engagement_type: str, author_did: str = None
@@ -35,58 +36,163 @@ class AuthorEngagementTracker:
             logger.error("Invalid parameters for update_engagement")
             return
 
-        try:
-            with db.atomic():
-                # Get post with FOR UPDATE lock to handle concurrent updates
-                post = Post.select().where(Post.uri == uri).for_update().first()
+        self.update_engagements(uri, [(engagement_type, author_did)])
 
-                if not post:
-                    # Post doesn't exist - fetch and create in one transaction
+    def update_engagements(
+        self,
+        uri: str,
+        engagements: Iterable[Tuple[str, Optional[str]]],
+        post: Union[int, dict, None] = None,
+    ) -> None:
+        """
+        Apply several engagements with a post in one set of queries.
+
+        Args:
+            uri: Post URI to update
+            engagements: (engagement_type, author_did) pairs for the post
+            post: The stored post id or fetched post data from
+                `prefetch_posts`; looked up (and fetched) here when omitted
+        """
+        counters = {"like": 0, "repost": 0, "reply": 0}
+        # Kind of each author's first engagement in this batch
+        author_kinds = {}
+        for engagement_type, author_did in engagements:
+            counters[engagement_type] += 1
+            if author_did:
+                author_kinds.setdefault(author_did, engagement_type)
+
+        # Counter deltas, applied in SQL so no read-modify-write is needed
+        increments = {
+            field: count
+            for field, count in (
+                (Post.likes_count, counters["like"]),
+                (Post.reposts_count, counters["repost"]),
+                (Post.replies_count, counters["reply"]),
+            )
+            if count
+        }
+
+        try:
+            key = hash_uri(uri)
+            if isinstance(post, dict):
+                post_id, post_data = None, post
+            elif post is not None:
+                post_id = post
+            else:
+                # Plain lookup, no row lock: every write below is atomic in SQL
+                post_id = Post.select(Post.id).where(Post.uri_hash == key).scalar()
+                if post_id is None:
                     post_data = self._fetch_post_content(uri)
                     if not post_data:
                         return
 
-                    post = Post.create(
-                        uri=post_data["uri"],
-                        cid=post_data["cid"],
-                        author_did=post_data["author_did"],
-                        author_handle=post_data["author_handle"],
-                        text=post_data["text"],
-                        indexed_at=get_utc_now(),
-                        engagement_score=0.0,
-                        likes_count=0,
-                        reposts_count=0,
-                        replies_count=0,
-                        engaged_authors=[],
-                        interaction_timestamps=[],
-                    )
-
-                # Update all engagement fields in a single update query
+            with db.atomic():
                 update_data = {}
+                if post_id is None:
+                    # Create the post with these counts. If another writer
+                    # created it meanwhile, add to its counts instead and
+                    # make LAST_INSERT_ID return the existing id
+                    on_duplicate = {Post.id: fn.LAST_INSERT_ID(Post.id)}
+                    on_duplicate.update(
+                        {field: field + count for field, count in increments.items()}
+                    )
+                    post_id = (
+                        Post.insert(
+                            uri=post_data["uri"],
+                            uri_hash=key,
+                            cid=post_data["cid"],
+                            author_did=post_data["author_did"],
+                            author_handle=post_data["author_handle"],
+                            text=post_data["text"],
+                            indexed_at=get_utc_now(),
+                            engagement_score=0.0,
+                            likes_count=counters["like"],
+                            reposts_count=counters["repost"],
+                            replies_count=counters["reply"],
+                            engaged_authors_count=0,
+                        )
+                        .on_conflict(update=on_duplicate)
+                        .execute()
+                    )
+                else:
+                    update_data.update(
+                        {field: field + count for field, count in increments.items()}
+                    )
 
-                # Update engagement count
-                if engagement_type == "like":
-                    update_data["likes_count"] = Post.likes_count + 1
-                elif engagement_type == "repost":
-                    update_data["reposts_count"] = Post.reposts_count + 1
-                elif engagement_type == "reply":
-                    update_data["replies_count"] = Post.replies_count + 1
-
-                # Update engagement tracking with UTC timestamp
-                if author_did and author_did not in post.engaged_authors:
-                    update_data["engaged_authors"] = post.engaged_authors + [author_did]
-
-                    # Store timestamp as ISO format string for JSON serialization
-                    current_time = get_utc_now().isoformat()
-                    update_data["interaction_timestamps"] = (
-                        post.interaction_timestamps + [current_time]
+                # Record each author's first engagement with this post; repeat
+                # engagement by the same author hits the unique index
+                if author_kinds:
+                    engaged_at = get_utc_now()
+                    inserted = (
+                        PostEngagement.insert_many(
+                            [
+                                {
+                                    "post": post_id,
+                                    "author_did": author_did,
+                                    "kind": kind,
+                                    "engaged_at": engaged_at,
+                                }
+                                for author_did, kind in author_kinds.items()
+                            ]
+                        )
+                        .on_conflict_ignore()
+                        .as_rowcount()
+                        .execute()
                     )
+                    if inserted:
+                        update_data[Post.engaged_authors_count] = (
+                            Post.engaged_authors_count + inserted
+                        )
 
                 if update_data:
-                    Post.update(**update_data).where(Post.id == post.id).execute()
+                    Post.update(update_data).where(Post.id == post_id).execute()
 
         except Exception as e:
-            logger.error(f"Error in update_engagement for {uri}: {e}")
+            logger.error(f"Error in update_engagements for {uri}: {e}")
+
+    def prefetch_posts(self, uris: Iterable[str]) -> Dict[str, Union[int, dict]]:
+        """Look up stored posts and fetch the records of new ones.
+
+        Network calls happen here, before any write transaction opens: the
+        authors of new posts are resolved in one pass and their records are
+        fetched concurrently.
+
+        Returns:
+            URI -> stored post id, or URI -> fetched post data for posts not
+            stored yet. URIs whose record could not be fetched are omitted.
+        """
+        by_hash = {hash_uri(uri): uri for uri in uris}
+        posts: Dict[str, Union[int, dict]] = {
+            by_hash[uri_hash]: post_id
+            for post_id, uri_hash in Post.select(Post.id, Post.uri_hash)
+            .where(Post.uri_hash.in_(list(by_hash)))
+            .tuples()
+        }
+
+        new_uris = [uri for uri in by_hash.values() if uri not in posts]
+        if not new_uris:
+            return posts
+
+        dids = set()
+        for uri in new_uris:
+            try:
+                did = AtUri.from_str(uri).hostname
+            except Exception:
+                continue
+            if did.startswith("did:"):
+                dids.add(did)
+        if dids:
+            get_author_manager().resolve_many(dids)
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(new_uris), config.HANDLE_RESOLVE_WORKERS)
+        ) as executor:
+            for uri, post_data in zip(
+                new_uris, executor.map(self._fetch_post_content, new_uris)
+            ):
+                if post_data:
+                    posts[uri] = post_data
+        return posts
 
     def clean_old_posts(self) -> None:
         """Remove posts older than POST_LIFETIME_HOURS."""
@@ -109,31 +215,24 @@ class AuthorEngagementTracker:
         Returns:
             Dictionary containing post data or None if fetch fails
         """
-        for attempt in range(3):  # Add retry logic for network operations
-            try:
-                at_uri = AtUri.from_str(uri)
-                response = client.com.atproto.repo.get_record(
-                    {
-                        "repo": at_uri.hostname,
-                        "collection": at_uri.collection,
-                        "rkey": at_uri.rkey,
-                    }
-                )
-
-                return {
-                    "uri": uri,
-                    "cid": response.cid,
-                    "author_did": at_uri.hostname,
-                    "author_handle": author_manager.resolve_did_to_handle(
-                        at_uri.hostname
-                    ),
-                    "text": getattr(response.value, "text", ""),
-                }
-            except Exception as e:
-                if attempt == 2:  # Last attempt
-                    logger.error(f"Error fetching post content for {uri}: {e}")
-                    return None
-                logger.warning(f"Retry {attempt + 1} for {uri}: {e}")
+        try:
+            at_uri = AtUri.from_str(uri)
+            # Shares the pooled session, retries and concurrency limit with
+            # handle resolution
+            record = xrpc.get_record(at_uri.hostname, at_uri.collection, at_uri.rkey)
+        except Exception as e:
+            logger.error(f"Error fetching post content for {uri}: {e}")
+            return None
+
+        return {
+            "uri": uri,
+            "cid": record["cid"],
+            "author_did": at_uri.hostname,
+            "author_handle": get_author_manager().resolve_did_to_handle(
+                at_uri.hostname
+            ),
+            "text": record["value"].get("text", ""),
+        }
 
 
 # Initialize the global tracker instance
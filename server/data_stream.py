@@ -1,126 +1,325 @@
 # In data_stream.py
 
-from typing import Dict, Any, Set
-from server.authors import author_manager
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Any, FrozenSet, List, Optional, Tuple
+from peewee import fn
+from server.authors import get_author_manager
 from server.database import SubscriptionState, db
 from server.jetstream import JetstreamClient
 from server.data_filter import tracker
+from server.algos.daily_seo_feed import invalidate_feed_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Define constants at module level for performance
-INTERESTED_COLLECTIONS: Set[str] = {
-    "app.bsky.feed.like",
-    "app.bsky.feed.post",
-    "app.bsky.feed.repost",
+INTERESTED_COLLECTIONS: FrozenSet[str] = frozenset(
+    {
+        "app.bsky.feed.like",
+        "app.bsky.feed.post",
+        "app.bsky.feed.repost",
+    }
+)
+
+
+# Engagement type recorded for each collection
+ENGAGEMENT_TYPES: Dict[str, str] = {
+    "app.bsky.feed.like": "like",
+    "app.bsky.feed.repost": "repost",
+    "app.bsky.feed.post": "reply",
 }
 
+def _subject_uri(record: Dict[str, Any]) -> str:
+    return record["subject"]["uri"]
+
+
+def _reply_parent_uri(record: Dict[str, Any]) -> str:
+    return record["reply"]["parent"]["uri"]
+
+
+# Subject URI extractor for each collection; posts that are not replies
+# raise KeyError and are skipped
+SUBJECT_EXTRACTORS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "app.bsky.feed.like": _subject_uri,
+    "app.bsky.feed.repost": _subject_uri,
+    "app.bsky.feed.post": _reply_parent_uri,
+}
 
-def process_event(event: Dict[str, Any]) -> None:
+# Membership test bound to the author DID snapshot in run_jetstream
+_is_author: Callable[[Optional[str]], bool] = frozenset().__contains__
+
+
+# Events are written in batches of up to BATCH_SIZE, or whatever arrived
+# within BATCH_INTERVAL seconds of the first buffered event
+BATCH_SIZE = 500
+BATCH_INTERVAL = 0.2
+QUEUE_SIZE = 10_000
+
+# Batches without engagement only persist the cursor once it is this many
+# seconds stale; a crash replays at most that much of the stream
+CURSOR_FLUSH_INTERVAL = 1.0
+
+
+def extract_engagement(event: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
     """
-    Process a single event from the Jetstream service.
-    Optimized to minimize dictionary operations and memory allocations.
+    Extract (subject_uri, engagement_type, author_did) from a Jetstream event.
+    Returns None for events that are not seed author engagement.
     """
+    # Jetstream always sends these keys, so index instead of .get()
     try:
-        # Early return conditions
-        if event.get("kind") != "commit":
-            return
+        if event["kind"] != "commit":
+            return None
+        did = event["did"]
+        commit = event["commit"]
+    except KeyError:
+        commit = None
+    if not commit:
+        logger.debug("Received commit event without commit data")
+        return None
 
-        commit = event.get("commit")
-        if not commit:
-            logger.warning("Received commit event without commit data")
-            return
+    if not _is_author(did):
+        logger.debug("Received commit event from non-author DID: %s", did)
+        return None
 
-        did = event.get("did")
-        if not author_manager.is_author(did):
-            logger.warning(f"Received commit event from non-author DID: {did}")
-            return
+    collection = commit.get("collection")
+    if collection not in INTERESTED_COLLECTIONS:
+        logger.debug(
+            "Received commit event for uninterested collection: %s", collection
+        )
+        return None
 
-        collection = commit.get("collection")
-        if collection not in INTERESTED_COLLECTIONS:
-            logger.warning(
-                f"Received commit event for uninterested collection: {collection}"
-            )
-            return
+    # Process the commit
+    operation = commit.get("operation")
+    if operation != "create":  # We only handle creates for now
+        logger.debug("Received commit event with unhandled operation: %s", operation)
+        return None
 
-        # Process the commit
-        operation = commit.get("operation")
-        if operation != "create":  # We only handle creates for now
-            logger.warning(
-                f"Received commit event with unhandled operation: {operation}"
-            )
-            return
+    record = commit.get("record", {})
+    record_type = record.get("$type")
+    if record_type != collection:  # Verify record type matches collection
+        logger.debug(
+            "Received commit event with mismatched record type: %s", record_type
+        )
+        return None
 
-        record = commit.get("record", {})
-        record_type = record.get("$type")
-        if record_type != collection:  # Verify record type matches collection
-            logger.warning(
-                f"Received commit event with mismatched record type: {record_type}"
-            )
-            return
+    # Get the subject URI based on collection type
+    try:
+        subject_uri = SUBJECT_EXTRACTORS[collection](record)
+    except (KeyError, TypeError):
+        return None
 
-        # Get the subject URI based on collection type
-        subject_uri = None
-        if collection == "app.bsky.feed.like":
-            subject_uri = record.get("subject", {}).get("uri")
-        elif collection == "app.bsky.feed.repost":
-            subject_uri = record.get("subject", {}).get("uri")
-        elif collection == "app.bsky.feed.post" and "reply" in record:
-            subject_uri = record.get("reply", {}).get("parent", {}).get("uri")
+    if not subject_uri:
+        return None
 
-        if subject_uri:
-            # Update engagement metrics in a single database transaction
-            with db.atomic():
-                engagement_type = {
-                    "app.bsky.feed.like": "like",
-                    "app.bsky.feed.repost": "repost",
-                    "app.bsky.feed.post": "reply",
-                }[collection]
+    return subject_uri, ENGAGEMENT_TYPES[collection], did
 
-                tracker.update_engagement(subject_uri, engagement_type, author_did=did)
 
-            logger.info(f"Processed {engagement_type} for {subject_uri}")
+class BatchWriter:
+    """
+    Buffers Jetstream events and writes them from a single thread.
 
-    except Exception as e:
-        logger.error(f"Error processing event: {e}", exc_info=True)
+    Each batch's engagement is coalesced per post URI and committed in one
+    transaction instead of one per event; posts the batch needs are fetched
+    before it opens. The subscription cursor is then advanced to the newest
+    event in its own statement, so a failed cursor write never discards
+    engagement. Batches without engagement hold the cursor in memory until
+    CURSOR_FLUSH_INTERVAL has passed or the writer stops.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        batch_size: int = BATCH_SIZE,
+        interval: float = BATCH_INTERVAL,
+        maxsize: int = QUEUE_SIZE,
+        cursor_interval: float = CURSOR_FLUSH_INTERVAL,
+    ):
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._batch_size = batch_size
+        self._interval = interval
+        self._cursor_interval = cursor_interval
+        self._pending_cursor = 0
+        self._cursor_saved_at = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name="batch-writer", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        self._thread.start()
+
+    def put(self, event: Dict[str, Any]) -> None:
+        """Queue an event; blocks when the writer falls QUEUE_SIZE behind."""
+        self._queue.put(event)
+
+    def close(self) -> None:
+        """Write any buffered events and stop the writer thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
 
+    def _run(self) -> None:
+        while True:
+            batch, stopping = self._drain()
+            if batch:
+                # The writer must outlive any bad batch: if it died, the
+                # queue would fill and put() would stall the websocket
+                try:
+                    self._flush(batch)
+                except Exception as e:
+                    logger.error(f"Failed to flush event batch: {e}", exc_info=True)
+            if stopping:
+                self._flush_cursor()
+                return
 
-def on_message_handler(event):
-    """Handle incoming messages efficiently."""
-    logger.info("Received new message")
+    def _drain(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """Block for one event, then collect more until the batch is full."""
+        event = self._queue.get()
+        if event is self._STOP:
+            return [], True
 
-    # Update cursor if present
-    time_us = event.get("time_us")
-    if time_us:
+        batch = [event]
+        deadline = time.monotonic() + self._interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                event = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if event is self._STOP:
+                return batch, True
+            batch.append(event)
+        return batch, False
+
+    def _save_cursor(self) -> None:
+        if self._pending_cursor:
+            # Creates the row on first use; GREATEST keeps the stored cursor
+            # from moving backwards
+            SubscriptionState.insert(
+                service="jetstream", cursor=self._pending_cursor
+            ).on_conflict(
+                update={
+                    SubscriptionState.cursor: fn.GREATEST(
+                        fn.COALESCE(SubscriptionState.cursor, 0),
+                        fn.VALUES(SubscriptionState.cursor),
+                    )
+                }
+            ).execute()
+            self._pending_cursor = 0
+        self._cursor_saved_at = time.monotonic()
+
+    def _flush_cursor(self) -> None:
+        """Persist the pending cursor; it is kept for a retry on failure."""
         try:
-            with db.atomic():
-                SubscriptionState.update(cursor=time_us).where(
-                    SubscriptionState.service == "jetstream"
-                ).execute()
+            self._save_cursor()
         except Exception as e:
-            logger.error(f"Failed to update cursor: {e}")
+            logger.error(f"Failed to save cursor: {e}", exc_info=True)
+            # Retry after the flush interval rather than on every batch
+            self._cursor_saved_at = time.monotonic()
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """Write a batch's engagement in one transaction, then its cursor."""
+        engagements: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        for event in batch:
+            try:
+                self._pending_cursor = max(
+                    self._pending_cursor, event.get("time_us") or 0
+                )
+                engagement = extract_engagement(event)
+            except Exception as e:
+                logger.error(f"Error processing event: {e}", exc_info=True)
+                continue
+            if engagement:
+                subject_uri, engagement_type, did = engagement
+                engagements[subject_uri].append((engagement_type, did))
+
+        cursor_stale = (
+            time.monotonic() - self._cursor_saved_at >= self._cursor_interval
+        )
+        if not engagements and not cursor_stale:
+            return
 
-    # Process the event
-    process_event(event)
+        # Look up posts and fetch new ones before the transaction opens, so
+        # it only holds writes
+        posts = {}
+        if engagements:
+            try:
+                posts = tracker.prefetch_posts(engagements)
+            except Exception as e:
+                logger.error(f"Failed to look up batch posts: {e}", exc_info=True)
+                return
 
+        if posts:
+            try:
+                with db.atomic():
+                    for subject_uri, post in posts.items():
+                        tracker.update_engagements(
+                            subject_uri, engagements[subject_uri], post
+                        )
+            except Exception as e:
+                logger.error(f"Failed to write event batch: {e}", exc_info=True)
+                return
 
-def run_jetstream():
-    """Main run loop for the Jetstream service."""
+        self._flush_cursor()
+
+        if posts:
+            # Serve the new engagement instead of a cached page
+            invalidate_feed_cache()
+            logger.debug(
+                "Processed %d events with engagement on %d posts",
+                len(batch),
+                len(engagements),
+            )
+
+
+def run_jetstream(stop_event: Optional[threading.Event] = None):
+    """Main run loop for the Jetstream service.
+
+    Args:
+        stop_event: Optional event (e.g. a `multiprocessing.Event`) that stops
+            the client when set.
+    """
+    global _is_author
     try:
+        db.connect(reuse_if_open=True)
+
+        author_manager = get_author_manager()
+        _is_author = author_manager.author_dids.__contains__
+
         # Get the last cursor position if any
         state = SubscriptionState.get_or_none(SubscriptionState.service == "jetstream")
         cursor = state.cursor if state and state.cursor is not None else None
 
+        # Events are handed to the writer thread; the websocket thread only
+        # parses and queues them
+        writer = BatchWriter()
+        writer.start()
+
         # Start the Jetstream client
         client = JetstreamClient(
             wanted_collections=list(INTERESTED_COLLECTIONS),
             wanted_dids=list(author_manager.author_dids),
             cursor=cursor,
-            on_message_callback=on_message_handler,
+            on_message_callback=writer.put,
         )
 
-        client.start()
+        if stop_event is not None:
+
+            def stop_when_set():
+                stop_event.wait()
+                client.stop()
+
+            threading.Thread(target=stop_when_set, daemon=True).start()
+
+        try:
+            client.start()
+        finally:
+            writer.close()
 
     except Exception as e:
         logger.error(f"Error in jetstream service: {e}")
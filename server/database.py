@@ -1,15 +1,23 @@
 """Database models for the feed generator service."""
 
+import hashlib
 from datetime import datetime, timezone
+from typing import Optional
 from playhouse.mysql_ext import JSONField
+from playhouse.migrate import MySQLMigrator, migrate
 from peewee import (
     Model,
+    BigIntegerField,
     CharField,
+    FixedCharField,
+    ForeignKeyField,
     IntegerField,
     FloatField,
     DateTimeField,
     TextField,
     MySQLDatabase,
+    Entity,
+    fn,
 )
 from server import config
 
@@ -23,27 +31,34 @@ def get_utc_now():
     return datetime.now(timezone.utc)
 
 
+def hash_uri(uri: str) -> str:
+    """Return the 16 character lookup key stored in Post.uri_hash."""
+    return hashlib.blake2b(uri.encode(), digest_size=8).hexdigest()
+
+
+def _parse_interaction_time(value) -> Optional[datetime]:
+    """Parse a legacy ISO interaction timestamp, or None if malformed."""
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
 # Environment-specific table names
 ENV_PREFIX = "dev_" if config.STAGE == "DEV" else ""
 
-# Initialize database connection
-try:
-    db = MySQLDatabase(
-        config.DATABASE_NAME,
-        user=config.DATABASE_USER,
-        password=config.DATABASE_PASSWORD,
-        host=config.DATABASE_HOST,
-        port=int(config.DATABASE_PORT),
-        ssl={"ssl_mode": config.DATABASE_SSL_MODE},
-        connect_timeout=30,
-        read_timeout=30,
-        write_timeout=30,
-    )
-    db.connect()
-    logger.info(f"Database connected successfully (Environment: {config.STAGE})")
-except Exception as e:
-    logger.error(f"Database connection failed: {e}")
-    raise
+# Database handle; the connection is opened on first use
+db = MySQLDatabase(
+    config.DATABASE_NAME,
+    user=config.DATABASE_USER,
+    password=config.DATABASE_PASSWORD,
+    host=config.DATABASE_HOST,
+    port=int(config.DATABASE_PORT),
+    ssl={"ssl_mode": config.DATABASE_SSL_MODE},
+    connect_timeout=30,
+    read_timeout=30,
+    write_timeout=30,
+)
 
 
 class BaseModel(Model):
@@ -54,8 +69,13 @@ class BaseModel(Model):
 class Post(BaseModel):
     class Meta:
         table_name = f"{ENV_PREFIX}posts"
+        # Keyset index for (indexed_at, cid) cursor pagination
+        indexes = ((("indexed_at", "cid"), False),)
 
-    uri = CharField(unique=True)
+    uri = CharField()
+    # Fixed-width unique key for URI lookups and upserts (see hash_uri);
+    # nullable only so the column can be added to existing tables
+    uri_hash = FixedCharField(max_length=16, unique=True, null=True)
     cid = CharField()
     author_did = CharField()
     author_handle = CharField()
@@ -64,41 +84,199 @@ class Post(BaseModel):
     likes_count = IntegerField(default=0)
     reposts_count = IntegerField(default=0)
     replies_count = IntegerField(default=0)
+    # Number of PostEngagement rows, maintained by the writer so the
+    # ranker can filter on MIN_AUTHOR_ENGAGEMENT without aggregating
+    engaged_authors_count = IntegerField(default=0)
     indexed_at = DateTimeField(default=get_utc_now)
 
-    # Store arrays directly as JSON
-    engaged_authors = JSONField(null=True, default=list)
-    interaction_timestamps = JSONField(null=True, default=list)
+    # Legacy per-post engagement arrays, superseded by PostEngagement rows
+    # and cleared once migrated (see migrate_legacy_engagements)
+    engaged_authors = JSONField(null=True)
+    interaction_timestamps = JSONField(null=True)
 
     def save(self, *args, **kwargs):
         if self.indexed_at and self.indexed_at.tzinfo is None:
             self.indexed_at = self.indexed_at.replace(tzinfo=timezone.utc)
 
-        # Ensure we have lists even if None
-        if self.engaged_authors is None:
-            self.engaged_authors = []
-        if self.interaction_timestamps is None:
-            self.interaction_timestamps = []
-
         return super().save(*args, **kwargs)
 
 
+class PostEngagement(BaseModel):
+    """First engagement of a seed author with a post."""
+
+    class Meta:
+        table_name = f"{ENV_PREFIX}post_engagements"
+        indexes = ((("post", "author_did"), True),)
+
+    post = ForeignKeyField(Post, backref="engagements", on_delete="CASCADE")
+    author_did = CharField()
+    # "like", "repost" or "reply"; NULL for rows migrated from legacy columns
+    kind = CharField(max_length=6, null=True)
+    engaged_at = DateTimeField(default=get_utc_now, index=True)
+
+
 class SubscriptionState(BaseModel):
     class Meta:
         table_name = f"{ENV_PREFIX}subscription_state"
 
     service = CharField(unique=True)
-    cursor = IntegerField(null=True, default=None)
+    # Jetstream time_us (microseconds since the epoch) needs 64 bits
+    cursor = BigIntegerField(null=True, default=None)
 
 
 def get_table_names():
     """Get the current environment's table names for logging/debugging"""
     return {
         "posts": Post._meta.table_name,
+        "post_engagements": PostEngagement._meta.table_name,
         "subscription_state": SubscriptionState._meta.table_name,
     }
 
 
+def add_missing_schema(models):
+    """Add columns and Meta indexes missing from existing tables.
+
+    `create_tables` skips tables that already exist on MySQL, so fields and
+    composite indexes added to the models later are created here. Returns
+    the (table, column) pairs that were added.
+    """
+    migrator = MySQLMigrator(db)
+    operations = []
+    added = []
+    for model in models:
+        table_name = model._meta.table_name
+        existing = {column.name for column in db.get_columns(table_name)}
+        for field in model._meta.sorted_fields:
+            if field.column_name not in existing:
+                logger.warning(f"Adding column {table_name}.{field.column_name}")
+                operations.append(
+                    migrator.add_column(table_name, field.column_name, field)
+                )
+                added.append((table_name, field.column_name))
+
+        indexed = {tuple(index.columns) for index in db.get_indexes(table_name)}
+        for field_names, unique in model._meta.indexes:
+            columns = tuple(
+                model._meta.fields[name].column_name for name in field_names
+            )
+            if columns not in indexed:
+                logger.warning(f"Adding index on {table_name}{columns}")
+                operations.append(migrator.add_index(table_name, columns, unique))
+
+    if operations:
+        migrate(*operations)
+    return added
+
+
+def widen_to_bigint(field):
+    """Change an existing INT column to BIGINT to match a BigIntegerField.
+
+    `add_missing_schema` only adds columns, so a field whose type was
+    widened later is altered here. Returns True if the column was changed.
+    """
+    table_name = field.model._meta.table_name
+    data_types = {
+        column.name: column.data_type.lower() for column in db.get_columns(table_name)
+    }
+    if data_types.get(field.column_name) != "int":
+        return False
+
+    logger.warning(f"Widening {table_name}.{field.column_name} to BIGINT")
+    # MySQLMigrator.alter_column_type emits "MODIFY `col` `col` BIGINT",
+    # which MySQL rejects; CHANGE takes the column name twice
+    ctx = db.get_sql_context()
+    ctx.literal("ALTER TABLE ").sql(Entity(table_name)).literal(" CHANGE ").sql(
+        Entity(field.column_name)
+    ).literal(" ").sql(field.ddl(ctx))
+    db.execute_sql(*ctx.query())
+    return True
+
+
+def backfill_uri_hashes():
+    """Fill Post.uri_hash for rows created before the column existed."""
+    rows = list(
+        Post.select(Post.id, Post.uri).where(Post.uri_hash.is_null()).tuples()
+    )
+    with db.atomic():
+        for post_id, uri in rows:
+            Post.update(uri_hash=hash_uri(uri)).where(Post.id == post_id).execute()
+
+
+def drop_index_on(model, column_names):
+    """Drop indexes covering exactly `column_names`, if any exist."""
+    table_name = model._meta.table_name
+    migrator = MySQLMigrator(db)
+    operations = [
+        migrator.drop_index(table_name, index.name)
+        for index in db.get_indexes(table_name)
+        if tuple(index.columns) == tuple(column_names)
+    ]
+    if operations:
+        logger.warning(f"Dropping index on {table_name}{tuple(column_names)}")
+        migrate(*operations)
+
+
+def refresh_engaged_authors_count(post_ids=None):
+    """Recompute Post.engaged_authors_count from PostEngagement rows."""
+    engaged = PostEngagement.select(fn.COUNT(PostEngagement.id)).where(
+        PostEngagement.post == Post.id
+    )
+    query = Post.update(engaged_authors_count=engaged)
+    if post_ids is not None:
+        query = query.where(Post.id.in_(post_ids))
+    query.execute()
+
+
+def migrate_legacy_engagements(batch_size=500):
+    """Move engagement stored on legacy Post columns into PostEngagement.
+
+    Authors and interaction times were appended pairwise, so the i-th author
+    is matched with the i-th timestamp; missing or malformed times fall back
+    to the post's indexed_at. Migrated rows have their legacy columns
+    cleared so they are not picked up again.
+    """
+    legacy_posts = list(
+        Post.select(
+            Post.id,
+            Post.indexed_at,
+            Post.engaged_authors,
+            Post.interaction_timestamps,
+        ).where(fn.JSON_LENGTH(Post.engaged_authors) > 0)
+    )
+    if not legacy_posts:
+        return
+
+    logger.warning(f"Migrating legacy engagement for {len(legacy_posts)} posts")
+    for start in range(0, len(legacy_posts), batch_size):
+        batch = legacy_posts[start : start + batch_size]
+        rows = []
+        for post in batch:
+            timestamps = post.interaction_timestamps or []
+            for i, author_did in enumerate(post.engaged_authors):
+                engaged_at = (
+                    _parse_interaction_time(timestamps[i])
+                    if i < len(timestamps)
+                    else None
+                )
+                rows.append(
+                    {
+                        "post": post.id,
+                        "author_did": author_did,
+                        "engaged_at": engaged_at or post.indexed_at,
+                    }
+                )
+
+        with db.atomic():
+            post_ids = [post.id for post in batch]
+            if rows:
+                PostEngagement.insert_many(rows).on_conflict_ignore().execute()
+                refresh_engaged_authors_count(post_ids)
+            Post.update(
+                engaged_authors=None,
+                interaction_timestamps=None,
+            ).where(Post.id.in_(post_ids)).execute()
+
+
 def initialize_database(rebuild=False):
     """Initialize the database, optionally rebuilding it."""
     table_names = get_table_names()
@@ -106,10 +284,33 @@ def initialize_database(rebuild=False):
         f"Initializing database tables for environment {config.STAGE}: {table_names}"
     )
 
+    try:
+        db.connect(reuse_if_open=True)
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        raise
+    logger.info(f"Database connected successfully (Environment: {config.STAGE})")
+
     with db:
         if rebuild:
             logger.warning(f"Rebuilding tables: {table_names}")
-            db.drop_tables([Post, SubscriptionState])
-        db.create_tables([Post, SubscriptionState])
+            db.drop_tables([PostEngagement, Post, SubscriptionState])
+        db.create_tables([Post, PostEngagement, SubscriptionState])
+        added = add_missing_schema([Post, PostEngagement, SubscriptionState])
+        if (Post._meta.table_name, "engaged_authors_count") in added:
+            logger.warning("Backfilling engaged author counts")
+            refresh_engaged_authors_count()
+        if (Post._meta.table_name, "uri_hash") in added:
+            logger.warning("Backfilling post URI hashes")
+            backfill_uri_hashes()
+            # uri_hash supersedes the wide unique index on uri
+            drop_index_on(Post, ("uri",))
+        if widen_to_bigint(SubscriptionState.cursor):
+            # A 32-bit column clamps time_us to INT_MAX outside strict mode;
+            # such a cursor would replay from the oldest retained event
+            SubscriptionState.update(cursor=None).where(
+                SubscriptionState.cursor == 2**31 - 1
+            ).execute()
+        migrate_legacy_engagements()
 
         logger.info("Database initialization complete")
@@ -2,15 +2,16 @@
 
 import websocket
 import json
+import orjson
 import logging
+import random
 import socket
+import statistics
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Callable, Dict, Any
 
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s"
-)
-
 logger = logging.getLogger(__name__)
 
 JETSTREAM_HOSTS = {
@@ -18,37 +19,82 @@ JETSTREAM_HOSTS = {
     "us-west": ["jetstream1.us-west.bsky.network", "jetstream2.us-west.bsky.network"],
 }
 
+DEFAULT_HOST = "jetstream2.us-east.bsky.network"
+
+# Latency is the median of several TCP connects per host; a host that
+# fails one is treated as unreachable, so it costs at most PROBE_TIMEOUT
+PROBES_PER_HOST = 3
+PROBE_TIMEOUT = 5
+
+# Reconnect delay: 2**failures seconds with jitter, capped at
+# MAX_RECONNECT_DELAY
+MAX_RECONNECT_DELAY = 60
+MAX_RECONNECT_EXPONENT = 6
+
+# The selected host is reused across restarts for HOST_CACHE_TTL seconds
+HOST_CACHE_PATH = ".jetstream_host.json"
+HOST_CACHE_TTL = 3600
+
 
 def measure_latency(host: str) -> float:
     """Measure the latency to a host using TCP connection time."""
+    samples = []
+    for _ in range(PROBES_PER_HOST):
+        try:
+            start_time = time.perf_counter()
+            sock = socket.create_connection((host, 443), timeout=PROBE_TIMEOUT)
+            samples.append(time.perf_counter() - start_time)
+            sock.close()
+        except Exception as e:
+            # Stop at the first failure rather than waiting out every probe
+            logger.warning(f"Failed to measure latency for {host}: {e}")
+            return float("inf")
+    return statistics.median(samples)
+
+
+def _load_cached_host() -> Optional[str]:
+    """Return the previously selected host if it is still fresh."""
+    try:
+        with open(HOST_CACHE_PATH, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if time.time() - cached["picked_at"] < HOST_CACHE_TTL:
+            return cached["host"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable Jetstream host cache: {e}")
+    return None
+
+
+def _save_cached_host(host: str) -> None:
     try:
-        start_time = time.time()
-        sock = socket.create_connection((host, 443), timeout=5)
-        latency = time.time() - start_time
-        sock.close()
-        return latency
+        with open(HOST_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"host": host, "picked_at": time.time()}, f)
     except Exception as e:
-        logger.warning(f"Failed to measure latency for {host}: {e}")
-        return float("inf")
+        logger.warning(f"Could not save Jetstream host cache: {e}")
 
 
 def select_optimal_host() -> str:
     """Select the Jetstream host with the lowest latency."""
-    best_host = "jetstream2.us-east.bsky.network"  # Default fallback
-    best_latency = float("inf")
+    cached_host = _load_cached_host()
+    if cached_host:
+        logger.info(f"Using cached Jetstream host {cached_host}")
+        return cached_host
 
-    for region, hosts in JETSTREAM_HOSTS.items():
-        for host in hosts:
-            latency = measure_latency(host)
-            if latency < best_latency:
-                best_latency = latency
-                best_host = host
+    hosts = [host for region_hosts in JETSTREAM_HOSTS.values() for host in region_hosts]
+
+    # Probe all hosts concurrently; the wait is bounded by the slowest host
+    with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+        latencies = list(executor.map(measure_latency, hosts))
+
+    best_latency, best_host = min(zip(latencies, hosts))
 
     if best_latency == float("inf"):
         logger.warning("Could not measure latency to any hosts, using default")
-    else:
-        logger.info(f"Selected {best_host} with latency of {best_latency*1000:.2f}ms")
+        return DEFAULT_HOST
 
+    logger.info(f"Selected {best_host} with latency of {best_latency*1000:.2f}ms")
+    _save_cached_host(best_host)
     return best_host
 
 
@@ -77,10 +123,13 @@ class JetstreamClient:
         # Connection objects
         self.ws = None
         self.thread = None
+        self._stop = threading.Event()
+        self._failures = 0
 
     # Add cleanup method
     def __del__(self):
         """Ensure proper cleanup of WebSocket connection."""
+        self._stop.set()
         if self.ws:
             try:
                 self.ws.close()
@@ -99,11 +148,13 @@ class JetstreamClient:
     def on_message(self, ws, message):
         """Handle incoming websocket messages."""
         try:
-            data = json.loads(message)
+            data = orjson.loads(message)
+            # Resume from the last seen event when reconnecting
+            self.cursor = data.get("time_us", self.cursor)
             if self.on_message_callback:
                 self.on_message_callback(data)
         except Exception as e:
-            logger.error(f"Failed to process message: {e}")
+            logger.error("Failed to process message: %s", e)
 
     def on_error(self, ws, error):
         """Handle websocket errors."""
@@ -111,37 +162,48 @@ class JetstreamClient:
 
     def on_close(self, ws, close_status_code, close_msg):
         """Handle websocket connection closure."""
+        # Reconnection is handled by the loop in start()
         logger.info(f"Connection closed: {close_status_code} - {close_msg}")
 
-        # Add exponential backoff for reconnection
-        for attempt in range(5):  # Limit retry attempts
-            wait_time = 2**attempt  # Exponential backoff
-            logger.info(f"Reconnecting in {wait_time} seconds...")
-            time.sleep(wait_time)
-            try:
-                self.start()
-                return
-            except Exception as e:
-                logger.error(f"Reconnection attempt {attempt + 1} failed: {e}")
-        else:  # This executes if no successful return occurs in the for loop
-            logger.critical("All reconnection attempts failed")
-            raise ConnectionError("Failed to reconnect after 5 attempts")
-
     def on_open(self, ws):
         """Handle websocket connection opening."""
         logger.info("Connection established!")
+        self._failures = 0
+
+    def _reconnect_delay(self) -> float:
+        """Exponential backoff with jitter; grows while connections fail."""
+        delay = min(MAX_RECONNECT_DELAY, 2**self._failures * random.uniform(0.5, 1.5))
+        self._failures = min(self._failures + 1, MAX_RECONNECT_EXPONENT)
+        return delay
 
     def start(self):
-        """Start the Jetstream client."""
-        url = self._build_url()
-        logger.info(f"Connecting to: {url}")
-
-        self.ws = websocket.WebSocketApp(
-            url,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close,
-            on_open=self.on_open,
-        )
+        """Run the Jetstream client, reconnecting until stopped."""
+        while not self._stop.is_set():
+            url = self._build_url()
+            logger.info(f"Connecting to: {url}")
+
+            self.ws = websocket.WebSocketApp(
+                url,
+                on_message=self.on_message,
+                on_error=self.on_error,
+                on_close=self.on_close,
+                on_open=self.on_open,
+            )
 
-        self.ws.run_forever()
+            try:
+                self.ws.run_forever(ping_interval=20, ping_timeout=10)
+            except Exception as e:
+                logger.error(f"Connection failed: {e}")
+
+            if self._stop.is_set():
+                break
+
+            wait_time = self._reconnect_delay()
+            logger.info(f"Reconnecting in {wait_time:.1f} seconds...")
+            self._stop.wait(wait_time)
+
+    def stop(self):
+        """Close the connection without reconnecting."""
+        self._stop.set()
+        if self.ws:
+            self.ws.close()
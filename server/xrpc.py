@@ -0,0 +1,194 @@
+# server/xrpc.py
+"""Pooled HTTP session for unauthenticated XRPC calls."""
+
+import atexit
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+import orjson
+from server import config
+
+
+def _new_session() -> httpx.Client:
+    """Create a keep-alive session against the XRPC service."""
+    return httpx.Client(
+        base_url=config.XRPC_BASE_URL,
+        http2=True,
+        timeout=10,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    )
+
+
+session = _new_session()
+
+
+def _close_session() -> None:
+    session.close()
+
+
+def _reset_after_fork() -> None:
+    # Pooled sockets must not be shared with the parent (gunicorn preloads
+    # the app before forking workers)
+    global session
+    session = _new_session()
+
+
+atexit.register(_close_session)
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a sliding-window request quota.
+
+    The number of concurrent calls grows by `increase` after each success
+    and is multiplied by `decrease` when the service throttles or fails, so
+    bursts settle just below the point where 429s start. Independently, at
+    most `rate_limit` calls are started per `rate_window` seconds.
+    """
+
+    def __init__(
+        self,
+        initial: float = 4,
+        minimum: float = 1,
+        maximum: float = 32,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+        rate_limit: int = 3000,
+        rate_window: float = 300,
+    ):
+        self._limit = float(initial)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._increase = increase
+        self._decrease = decrease
+        self._rate_limit = rate_limit
+        self._rate_window = rate_window
+        self._started: deque = deque()
+        self._active = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _wait_for_quota(self) -> None:
+        # Called with the condition held; drops expired starts and waits
+        # until the oldest one leaves the window
+        while True:
+            now = time.monotonic()
+            while self._started and now - self._started[0] >= self._rate_window:
+                self._started.popleft()
+            if len(self._started) < self._rate_limit:
+                self._started.append(now)
+                return
+            self._cond.wait(self._rate_window - (now - self._started[0]))
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one concurrency slot for the duration of a call."""
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            # Take the slot before the quota wait, which releases the
+            # condition and would otherwise let others past the limit check
+            self._active += 1
+            self._wait_for_quota()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                # Quota waiters share the condition, so wake everyone
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self._limit = min(self._maximum, self._limit + self._increase)
+            self._cond.notify()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            self._limit = max(self._minimum, self._limit * self._decrease)
+
+
+limiter = AdaptiveLimiter(
+    maximum=config.XRPC_MAX_CONCURRENCY,
+    rate_limit=config.XRPC_RATE_LIMIT,
+    rate_window=config.XRPC_RATE_WINDOW,
+)
+
+
+# Longest wait before a retry; callers such as the single batch writer
+# thread must not stall for a full rate limit window
+MAX_RETRY_DELAY = 30.0
+
+
+def backoff_delay(
+    attempt: int, base: float = 0.5, cap: float = MAX_RETRY_DELAY
+) -> float:
+    """Exponential backoff with jitter for retry `attempt` (0-based)."""
+    return min(cap, base * 2**attempt * random.uniform(0.5, 1.5))
+
+
+def retry_delay(response: Optional[httpx.Response], attempt: int) -> float:
+    """Delay before retrying, honouring the server's rate limit headers.
+
+    The server's delay may exceed MAX_RETRY_DELAY; `query` fails fast
+    instead of waiting that long.
+    """
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        reset = response.headers.get("ratelimit-reset")
+        if reset and reset.isdigit():
+            return max(0.0, int(reset) - time.time())
+    return backoff_delay(attempt)
+
+
+def _retryable(response: httpx.Response) -> bool:
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def query(nsid: str, **params: Any) -> Dict[str, Any]:
+    """Call an XRPC query method and return the decoded JSON body.
+
+    Throttled (429), failed (5xx) and disconnected calls are retried up to
+    XRPC_RETRIES times with backoff; other errors raise immediately, as do
+    throttled calls whose rate limit resets more than MAX_RETRY_DELAY
+    seconds away.
+    """
+    for attempt in range(config.XRPC_RETRIES):
+        response = None
+        try:
+            with limiter.slot():
+                response = session.get(nsid, params=params)
+        except httpx.TransportError:
+            if attempt == config.XRPC_RETRIES - 1:
+                raise
+        else:
+            if not _retryable(response):
+                limiter.on_success()
+                response.raise_for_status()
+                return orjson.loads(response.content)
+            if attempt == config.XRPC_RETRIES - 1:
+                response.raise_for_status()
+
+        limiter.on_throttle()
+        delay = retry_delay(response, attempt)
+        if delay > MAX_RETRY_DELAY:
+            response.raise_for_status()
+        time.sleep(delay)
+
+
+def get_record(repo: str, collection: str, rkey: str) -> Dict[str, Any]:
+    """Fetch a record as plain JSON (`uri`, `cid` and the `value` dict)."""
+    return query(
+        "com.atproto.repo.getRecord", repo=repo, collection=collection, rkey=rkey
+    )